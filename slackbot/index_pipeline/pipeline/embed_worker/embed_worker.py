@@ -1,15 +1,25 @@
-"""GPU embedding worker — TEI sidecar, returns chunks to the pipeline."""
+"""GPU embedding worker — TEI sidecar, streams chunks to UpsertWorker."""
+
+from collections import deque
 
 import modal
 
 from slackbot.modal_app import app, rag_vol
 
+from ..upsert_worker import UPSERT_BATCH, UpsertWorker
+from .helpers.chunker import Chunker
+from .helpers.embedding_cache import EmbeddingCache
 from .helpers.file_parser import FileParser
-from .tei_server import BATCH_SIZE, PORT, TeiServer
+from .tei_server import MAX_INPUT_TOKENS, MODEL, TeiClient, TeiServer
 
 WORKERS_PER_GPU = 4
-CHUNK_SIZE = 1024
-CHUNK_OVERLAP = 128
+# Model tokens per chunk: MAX_INPUT_TOKENS less [CLS]/[SEP], so every token is embedded
+CHUNK_SIZE = MAX_INPUT_TOKENS - 2
+CHUNK_OVERLAP = 64
+# Documents tokenized per encode_batch call
+SPLIT_GROUP = 64
+# Upsert groups in flight per input before embedding blocks on the oldest
+MAX_PENDING_UPSERTS = 2
 
 # TEI base image + parsing/chunking libs
 embed_image = (
@@ -21,9 +31,12 @@ embed_image = (
     .uv_pip_install(
         "llama-index-core",
         "llama-index-readers-file",
-        "pypdf",
-        "python-docx",
+        "pypdfium2",
+        "docx2txt",
         "httpx",
+        "numpy",
+        "tokenizers",
+        "xxhash",
     )
     .run_commands("python -c \"import nltk; nltk.download('punkt_tab'); nltk.download('stopwords')\"")
 )
@@ -48,43 +61,84 @@ class EmbedWorker:
 
     @modal.enter()
     def _setup(self):
-        import httpx
-        from llama_index.core.node_parser import TokenTextSplitter
-
         self._tei = TeiServer()
         self._tei.start()
-        self._splitter = TokenTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        self._chunker = Chunker(MODEL, CHUNK_SIZE, CHUNK_OVERLAP, MAX_INPUT_TOKENS)
         self._parser = FileParser()
-        self._http = httpx.Client(timeout=120.0)
+        self._tei_client = TeiClient()
+        self._embed_cache = EmbeddingCache(self._tei_client.embed)
+        self._upsert_worker = UpsertWorker()
+
+    @modal.exit()
+    def _teardown(self):
+        self._tei.stop()
 
     @modal.method()
-    def embed(self, work: dict, worker_id: int) -> tuple[list, int]:
-        """Parse files, chunk, embed via TEI. Returns (chunks, worker_id)."""
-        docs = self._parser.parse(work)
-        chunks = self._chunk_and_embed(docs)
-        return chunks, worker_id
-
-    def _chunk_and_embed(self, docs: list) -> list:
-        """Split docs into chunks and embed via TEI."""
-        nodes = self._splitter.get_nodes_from_documents(docs)
-        if not nodes:
-            return []
-        texts = [n.get_content() for n in nodes]
-        embeddings = self._embed_texts(texts)
-        return [
-            (n.node_id, emb, text, n.metadata)
-            for n, emb, text in zip(nodes, embeddings, texts)
-        ]
-
-    def _embed_texts(self, texts: list[str]) -> list[list[float]]:
-        """Batch POST to TEI sidecar."""
-        embeddings: list[list[float]] = []
-        for i in range(0, len(texts), BATCH_SIZE):
-            batch = texts[i : i + BATCH_SIZE]
-            resp = self._http.post(
-                f"http://127.0.0.1:{PORT}/embed",
-                json={"inputs": batch},
-            )
-            resp.raise_for_status()
-            embeddings.extend(resp.json())
-        return embeddings
+    def embed(self, work: dict, worker_id: int) -> tuple[int, int]:
+        """Parse files, chunk, embed via TEI. Returns (n_chunks, worker_id).
+
+        Chunks are buffered across files and embedded in groups of
+        UPSERT_BATCH, so small files still fill TEI's client batches. Each
+        group is spawned to UpsertWorker as soon as it's embedded, so
+        ChromaDB writes overlap parsing and embedding of the next group.
+        Parsing and splitting run one SPLIT_GROUP ahead on a helper thread,
+        so the CPU prep for the next documents overlaps the wait on TEI.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from itertools import batched  # 3.12+, same as the image's Python
+
+        pending: deque = deque()
+        chunks: list = []
+        total = 0
+        groups = batched(self._parser.parse(work), SPLIT_GROUP)
+        with ThreadPoolExecutor(max_workers=1) as prep:
+            next_split = prep.submit(self._split_next, groups)
+            while (split := next_split.result()) is not None:
+                next_split = prep.submit(self._split_next, groups)
+                chunks.extend(split)
+                while len(chunks) >= UPSERT_BATCH:
+                    group, chunks = chunks[:UPSERT_BATCH], chunks[UPSERT_BATCH:]
+                    total += self._flush_chunks(group, worker_id, pending)
+        if chunks:
+            total += self._flush_chunks(chunks, worker_id, pending)
+        total += sum(call.get() for call in pending)
+        return total, worker_id
+
+    def _split_next(self, groups) -> list | None:
+        """Parse and chunk the next group of documents; None once they run out."""
+        docs = next(groups, None)
+        return None if docs is None else self._chunker.split(docs)
+
+    def _flush_chunks(self, chunks: list, worker_id: int, pending: deque) -> int:
+        """Embed a group and spawn its upsert. Returns chunks confirmed upserted."""
+        pending.append(self._upsert_worker.upsert.spawn(self._embed_chunks(chunks), worker_id))
+        # Bound memory: don't run more than MAX_PENDING_UPSERTS groups ahead
+        if len(pending) > MAX_PENDING_UPSERTS:
+            return pending.popleft().get()
+        return 0
+
+    def _embed_chunks(self, chunks: list) -> dict:
+        """Embed chunks' token ids via TEI, skipping texts already embedded in this container.
+
+        Returns parallel columns (ids, embeddings, documents, metadatas) so
+        the upsert side can slice them without rebuilding per-chunk tuples.
+        Embeddings travel as float16 — TEI computed them at that precision,
+        so the float32 upcast can wait until UpsertWorker.
+        """
+        import numpy as np
+
+        # Ids are content-addressed, so identical text at the same position of
+        # one source (repeated sheets, duplicate zip members) repeats an id,
+        # and Chroma rejects a whole upsert with duplicate ids. Keep the first.
+        unique = {}
+        for c in chunks:
+            unique.setdefault(c.id, c)
+        chunks = list(unique.values())
+        texts = [c.text for c in chunks]
+        embeddings = self._embed_cache.embed(texts, [c.token_ids for c in chunks])
+        return {
+            "ids": [c.id for c in chunks],
+            "embeddings": embeddings.astype(np.float16),
+            "documents": texts,
+            "metadatas": [c.metadata for c in chunks],
+        }
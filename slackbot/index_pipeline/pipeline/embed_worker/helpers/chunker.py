@@ -0,0 +1,68 @@
+"""Split Documents into fixed-size, overlapping token windows."""
+
+from typing import NamedTuple
+
+
+class Chunk(NamedTuple):
+    id: str
+    text: str
+    # Model input for TEI: the window's ids wrapped in the model's special tokens
+    token_ids: list[int]
+    metadata: dict
+
+
+class Chunker:
+    """Sliding-window splitter over the embedding model's own tokenizer.
+
+    With a fixed chunk size and overlap, splitting is just windows of
+    chunk_size tokens every (chunk_size - chunk_overlap) tokens. Documents
+    are tokenized in one encode_batch call (Rust, multithreaded, outside
+    the GIL) and each window's text is sliced from the original string via
+    the tokenizer's character offsets, so casing and whitespace survive.
+    The window's token ids are kept too, so TEI doesn't tokenize it again.
+    """
+
+    def __init__(self, model: str, chunk_size: int, chunk_overlap: int, max_input_tokens: int):
+        import xxhash
+        from tokenizers import Tokenizer
+
+        self._tokenizer = Tokenizer.from_pretrained(model)
+        # Need every token of the document, not the model's 512-token view of it
+        self._tokenizer.no_truncation()
+        self._tokenizer.no_padding()
+        # TEI takes raw ids as-is, so wrap them the way the tokenizer would ([CLS] ... [SEP])
+        specials = self._tokenizer.encode("", add_special_tokens=True).ids
+        self._prefix, self._suffix = specials[:1], specials[1:]
+        # A longer window would be truncated by the model, leaving its tail unembedded
+        if chunk_size > max_input_tokens - len(specials):
+            raise ValueError(
+                f"chunk_size {chunk_size} exceeds the model's {max_input_tokens - len(specials)}-token input"
+            )
+        self._size = chunk_size
+        self._overlap = chunk_overlap
+        self._hash = xxhash.xxh3_128_hexdigest
+
+    def split(self, docs: list) -> list[Chunk]:
+        """Split docs into windows. Chunks inherit their document's metadata."""
+        texts = [d.text for d in docs]
+        encodings = self._tokenizer.encode_batch(texts, add_special_tokens=False)
+        chunks = []
+        for doc, text, enc in zip(docs, texts, encodings):
+            ids, offsets = enc.ids, enc.offsets
+            for i, (s, e) in enumerate(self._windows(len(ids))):
+                chunk = text[offsets[s][0] : offsets[e - 1][1]]
+                token_ids = self._prefix + ids[s:e] + self._suffix
+                chunks.append(Chunk(self._chunk_id(doc.metadata, i, chunk), chunk, token_ids, doc.metadata))
+        return chunks
+
+    def _windows(self, n: int) -> list[tuple[int, int]]:
+        """[start, end) token indices of each window over n tokens."""
+        if n == 0:
+            return []
+        stride = self._size - self._overlap
+        return [(s, min(s + self._size, n)) for s in range(0, max(1, n - self._overlap), stride)]
+
+    def _chunk_id(self, metadata: dict, index: int, text: str) -> str:
+        """Content-addressed id, so re-indexing unchanged text upserts over the same row."""
+        key = f"{metadata['source']}|{metadata.get('filename', '')}|{index}|{text}"
+        return self._hash(key.encode())
@@ -1,58 +1,111 @@
 """Parse files and zip archives into LlamaIndex Documents."""
 
-import io
+import mmap
+import threading
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Iterator
+
+# Zip entries decompressed in parallel, and how many are read ahead at once
+ZIP_READERS = 8
+ZIP_READ_WINDOW = 256
+
+# PDFium is not thread-safe, even across separate documents
+_PDFIUM_LOCK = threading.Lock()
 
 
 class FileParser:
 
-    def parse(self, work: dict) -> list:
-        """Parse a work unit into Documents ready for embedding."""
+    def __init__(self):
+        # Direct extension -> reader dispatch; anything else falls back to SimpleDirectoryReader
+        self._readers = {
+            ".pdf": _read_pdf,
+            ".txt": _read_text,
+            ".md": _read_text,
+            ".docx": _read_docx,
+        }
+
+    def parse(self, work: dict) -> Iterator:
+        """Yield Documents from a work unit, one file/entry at a time."""
         if work["type"] == "files":
-            return self._parse_files(work["paths"])
+            yield from self._parse_files(work["paths"])
         elif work["type"] == "zip_entries":
-            return self._parse_zip(work["zip_path"], work["entries"])
-        raise ValueError(f"Unknown work type: {work['type']}")
+            yield from self._parse_zip(work["zip_path"], work["entries"])
+        else:
+            raise ValueError(f"Unknown work type: {work['type']}")
 
-    def _parse_files(self, paths: list[str]) -> list:
-        """Parse loose files (PDF, DOCX, plaintext) via SimpleDirectoryReader.
+    def _parse_files(self, paths: list[str]) -> Iterator:
+        """Parse loose files (PDF, DOCX, plaintext) into Documents.
+
+        Common types are read directly by extension into one Document per
+        file; SimpleDirectoryReader, which constructs and sniffs a reader per
+        call, is only used for other types (CSV, Excel, ...). Unreadable
+        files (corrupt, encrypted) are logged and skipped.
 
         Each doc gets source (filename) and fingerprint (mtime:size) metadata
         so Scanner can detect changes on subsequent runs.
         """
-        from llama_index.core import SimpleDirectoryReader
-
-        docs = []
         for path in paths:
-            p = Path(path)
-            fingerprint = _fingerprint(p)
-            for doc in SimpleDirectoryReader(input_files=[path]).load_data():
-                doc.metadata["source"] = p.name
-                doc.metadata["fingerprint"] = fingerprint
-                docs.append(doc)
-        return docs
-
-    def _parse_zip(self, zip_path: str, entries: list[str]) -> list:
+            try:
+                docs = self._read_file(Path(path))
+            except Exception as e:
+                print(f"  embed-worker: skipping {Path(path).name}: {e}", flush=True)
+                continue
+            yield from docs
+
+    def _read_file(self, p: Path) -> list:
+        from llama_index.core import Document, SimpleDirectoryReader
+
+        metadata = {"source": p.name, "fingerprint": _fingerprint(p)}
+        reader = self._readers.get(p.suffix.lower())
+        if reader is None:
+            docs = SimpleDirectoryReader(input_files=[str(p)]).load_data()
+            for doc in docs:
+                doc.metadata.update(metadata)
+            return docs
+        text = reader(str(p))
+        return [Document(text=text, metadata=metadata)] if text.strip() else []
+
+    def _parse_zip(self, zip_path: str, entries: list[str]) -> Iterator:
         """Read assigned zip entries into Documents.
 
         Each entry is extracted as text (PDF pages joined, plaintext decoded).
         All entries share the zip file's source name and fingerprint.
+        Entries are read on a thread pool (zlib releases the GIL) one window
+        at a time, so decompression overlaps embedding without buffering
+        the whole batch. The archive is mmap-ed, so member reads are copies
+        out of the page cache rather than read syscalls. Those reads still
+        take ZipFile's shared-file lock one at a time; only decompression
+        runs in parallel.
         """
         from llama_index.core import Document
 
         p = Path(zip_path)
         fingerprint = _fingerprint(p)
-        docs = []
-        with zipfile.ZipFile(zip_path) as zf:
-            for name in entries:
-                text = _read_zip_entry(zf, name)
-                if text and text.strip():
-                    docs.append(Document(
-                        text=text,
-                        metadata={"source": p.name, "filename": name, "fingerprint": fingerprint},
-                    ))
-        return docs
+        with (
+            open(zip_path, "rb") as f,
+            _SeekableMmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+            zipfile.ZipFile(mm) as zf,
+            ThreadPoolExecutor(ZIP_READERS) as pool,
+        ):
+            read = partial(_read_zip_entry, zf)
+            for i in range(0, len(entries), ZIP_READ_WINDOW):
+                window = entries[i : i + ZIP_READ_WINDOW]
+                for name, text in zip(window, pool.map(read, window)):
+                    if text and text.strip():
+                        yield Document(
+                            text=text,
+                            metadata={"source": p.name, "filename": name, "fingerprint": fingerprint},
+                        )
+
+
+class _SeekableMmap(mmap.mmap):
+    """mmap only gained seekable() in 3.13; ZipFile needs it to open members."""
+
+    def seekable(self) -> bool:
+        return True
 
 
 def _fingerprint(path: Path) -> str:
@@ -62,12 +115,34 @@ def _fingerprint(path: Path) -> str:
 
 
 def _read_zip_entry(zf: zipfile.ZipFile, name: str) -> str | None:
-    """Extract text from a zip entry. PDFs via pypdf, everything else as UTF-8."""
+    """Extract text from a zip entry. PDFs via pypdfium2, everything else as UTF-8."""
     try:
         data = zf.read(name)
         if name.lower().endswith(".pdf"):
-            from pypdf import PdfReader
-            return "\n".join(p.extract_text() or "" for p in PdfReader(io.BytesIO(data)).pages)
+            return _read_pdf(data)
         return data.decode("utf-8", errors="replace")
     except Exception:
         return None
+
+
+def _read_text(path: str) -> str:
+    return Path(path).read_text(encoding="utf-8", errors="replace")
+
+
+def _read_docx(path: str) -> str:
+    """Body text including tables, same extraction as LlamaIndex's DocxReader."""
+    import docx2txt
+
+    return docx2txt.process(path)
+
+
+def _read_pdf(data: bytes | str) -> str:
+    """Extract text from PDF bytes or a path with PDFium (C++), pages joined by newlines."""
+    import pypdfium2 as pdfium
+
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(data)
+        try:
+            return "\n".join(page.get_textpage().get_text_range() for page in pdf)
+        finally:
+            pdf.close()
@@ -1,5 +1,6 @@
-"""TEI embedding server subprocess."""
+"""TEI embedding server subprocess and client."""
 
-from .server import BATCH_SIZE, MODEL, PORT, TeiServer
+from .client import TeiClient
+from .server import BATCH_SIZE, MAX_INPUT_TOKENS, MODEL, PORT, TeiServer
 
-__all__ = ["BATCH_SIZE", "MODEL", "PORT", "TeiServer"]
+__all__ = ["BATCH_SIZE", "MAX_INPUT_TOKENS", "MODEL", "PORT", "TeiClient", "TeiServer"]
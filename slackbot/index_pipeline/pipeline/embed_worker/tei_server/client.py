@@ -0,0 +1,87 @@
+"""Async TEI client — pipelines /embed batches over a pooled connection."""
+
+import asyncio
+import threading
+from typing import TYPE_CHECKING
+
+from .server import BATCH_SIZE, PORT
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MAX_IN_FLIGHT = 8
+MAX_CONNECTIONS = 32
+
+
+class TeiClient:
+    """Sends batches concurrently so TEI's dynamic batcher always has work queued.
+
+    A single event loop runs on a daemon thread and is shared by every
+    concurrent embed() input in the container, so keep-alive connections
+    are reused across inputs.
+    """
+
+    def __init__(self, port: int = PORT, batch_size: int = BATCH_SIZE, max_in_flight: int = MAX_IN_FLIGHT):
+        import httpx
+
+        self._batch_size = batch_size
+        self._max_in_flight = max_in_flight
+        self._http = httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}",
+            timeout=120.0,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+        )
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+
+    def embed(self, inputs: list) -> "np.ndarray":
+        """Embed inputs in order as a (len(inputs), dim) float32 array.
+
+        Each input is a string or a list of token ids (with special tokens);
+        TEI skips tokenization for the latter. Blocks the calling thread
+        until all batches return.
+        """
+        return asyncio.run_coroutine_threadsafe(self._embed_all(inputs), self._loop).result()
+
+    async def _embed_all(self, inputs: list) -> "np.ndarray":
+        import numpy as np
+
+        # Cap in-flight batches per call so one large input can't flood TEI's queue
+        sem = asyncio.Semaphore(self._max_in_flight)
+        # Batch inputs of similar length together so short chunks (document
+        # tails) aren't padded out to 512 tokens alongside full windows
+        order = sorted(range(len(inputs)), key=lambda i: len(inputs[i]))
+        out = None
+
+        # Each batch is copied into its rows of one preallocated array and
+        # dropped, rather than every batch staying alive for a final concatenate
+        async def fill(start: int) -> None:
+            nonlocal out
+            rows_idx = order[start : start + self._batch_size]
+            rows = await self._embed_batch([inputs[i] for i in rows_idx], sem)
+            if out is None:
+                out = np.empty((len(inputs), rows.shape[1]), dtype=np.float32)
+            # Scatter back to input order
+            out[rows_idx] = rows
+
+        await asyncio.gather(*(fill(i) for i in range(0, len(inputs), self._batch_size)))
+        return out
+
+    async def _embed_batch(self, batch: list, sem: asyncio.Semaphore) -> "np.ndarray":
+        async with sem:
+            resp = await self._http.post("/embed", json={"inputs": batch})
+            resp.raise_for_status()
+            return _parse_embeddings(resp.content, len(batch))
+
+
+def _parse_embeddings(body: bytes, rows: int) -> "np.ndarray":
+    """Decode TEI's [[f, ...], ...] JSON body straight into float32.
+
+    TEI only speaks JSON over HTTP. Stripping the brackets leaves a flat
+    comma-separated list that numpy parses in C, so no per-float Python
+    objects are ever created.
+    """
+    import numpy as np
+
+    flat = np.fromstring(body.translate(None, b"[] \n").decode("ascii"), dtype=np.float32, sep=",")
+    return flat.reshape(rows, -1)
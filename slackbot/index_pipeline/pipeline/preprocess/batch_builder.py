@@ -1,6 +1,6 @@
 """Splits files and zip entries into per-worker batches."""
 
-import math
+import heapq
 import zipfile
 
 
@@ -9,37 +9,55 @@ class BatchBuilder:
     def __init__(self, n_batches: int):
         self._n = n_batches
 
-    def build(self, files: list[str]) -> list[tuple[dict, int]]:
-        """Return (work_dict, worker_id) tuples ready for embed.starmap()."""
+    def build(self, files: list[tuple[str, int]]) -> list[tuple[dict, int]]:
+        """Return (work_dict, worker_id) tuples ready for embed.starmap().
+
+        files are (path, bytes) pairs from Scanner, so nothing is stat-ed twice.
+        """
         batches: list[dict] = []
         batches.extend(self._split_files(files))
         batches.extend(self._split_zips(files))
         return [(batch, i) for i, batch in enumerate(batches)]
 
-    def _split_files(self, files: list[str]) -> list[dict]:
-        """Distribute regular files evenly across workers."""
-        regular = [f for f in files if not f.endswith(".zip")]
-        return [{"type": "files", "paths": chunk} for chunk in self._chunk(regular)]
+    def _split_files(self, files: list[tuple[str, int]]) -> list[dict]:
+        """Distribute regular files across workers by size."""
+        # Embedding cost follows document length, not file count
+        regular = [(f, size) for f, size in files if not f.endswith(".zip")]
+        return [{"type": "files", "paths": chunk} for chunk in self._pack(regular)]
 
-    def _split_zips(self, files: list[str]) -> list[dict]:
-        """Expand each zip and distribute its entries across workers."""
+    def _split_zips(self, files: list[tuple[str, int]]) -> list[dict]:
+        """Expand each zip and distribute its entries across workers by size."""
         batches = []
-        for path in files:
+        for path, _ in files:
             if not path.endswith(".zip"):
                 continue
-            with zipfile.ZipFile(path) as zf:
-                entries = [n for n in zf.namelist() if not n.endswith("/")]
-            for chunk in self._chunk(entries):
+            try:
+                with zipfile.ZipFile(path) as zf:
+                    entries = [(i.filename, i.file_size) for i in zf.infolist() if not i.is_dir()]
+            except FileNotFoundError:
+                # Deleted or renamed since the scan; the next scan picks up whatever replaced it
+                print(f"[batch] skipping {path}: gone since scan", flush=True)
+                continue
+            for chunk in self._pack(entries):
                 batches.append({"type": "zip_entries", "zip_path": path, "entries": chunk})
         return batches
 
-    def _chunk(self, items: list) -> list[list]:
-        """Split items into roughly equal groups (up to self._n).
+    def _pack(self, sized: list[tuple[str, int]]) -> list[list[str]]:
+        """Bin-pack (name, bytes) items into up to self._n groups of ~equal bytes.
 
-        Each chunk is ceil(len(items) / n_batches) items. With 8 GPUs × 4
-        workers per GPU = 32 batches, 100 files produces 32 chunks of ~4 each.
+        Longest-processing-time first: largest items go first, each to the
+        currently lightest group. Archives are skewed (a few big PDFs among
+        many small pages), and so are uploads, so splitting by count leaves
+        stragglers.
         """
-        if not items:
+        if not sized:
             return []
-        size = math.ceil(len(items) / self._n)
-        return [items[i : i + size] for i in range(0, len(items), size)]
+        bins: list[list[str]] = [[] for _ in range(min(self._n, len(sized)))]
+        # Ties on bytes go to the group with fewer items, so zero-byte files spread out
+        heap = [(0, 0, i) for i in range(len(bins))]
+        for name, size in sorted(sized, key=lambda item: item[1], reverse=True):
+            total, count, i = heapq.heappop(heap)
+            bins[i].append(name)
+            heapq.heappush(heap, (total + size, count + 1, i))
+        # Every group becomes a work item, i.e. a GPU input; never ship an empty one
+        return [b for b in bins if b]
@@ -1,5 +1,6 @@
 """Document scanner — finds new/changed files via ChromaDB comparison."""
 
+import os
 from pathlib import Path
 from typing import Callable
 
@@ -12,8 +13,8 @@ class Scanner:
         self._docs_dir = docs_dir
         self._get_indexed = get_indexed
 
-    def scan(self) -> list[str]:
-        """Compare disk fingerprints against ChromaDB, return new/changed files."""
+    def scan(self) -> list[tuple[str, int]]:
+        """Compare disk fingerprints against ChromaDB, return new/changed (path, bytes)."""
         rag_vol.reload()
         if not self._docs_dir.exists():
             return []
@@ -21,18 +22,21 @@ class Scanner:
         # {filename: fingerprint} for files already in ChromaDB
         indexed = self._get_indexed()
 
-        # Compare each file's current fingerprint against what's indexed
-        all_files = sorted(p for p in self._docs_dir.iterdir() if p.is_file())
-        new_or_changed = [p for p in all_files if indexed.get(p.name) != self._fingerprint(p)]
+        # Compare each file's current fingerprint against what's indexed.
+        # scandir answers is_file() from the dirent, leaving one stat() per file.
+        with os.scandir(self._docs_dir) as it:
+            all_files = sorted((e for e in it if e.is_file()), key=lambda e: e.name)
+        new_or_changed = [e for e in all_files if indexed.get(e.name) != self._fingerprint(e)]
 
         self._log(new_or_changed, len(all_files))
-        return [str(p) for p in new_or_changed]
+        # DirEntry caches the stat() from fingerprinting, so sizes cost nothing more
+        return [(e.path, e.stat().st_size) for e in new_or_changed]
 
-    def _fingerprint(self, path: Path) -> str:
-        stat = path.stat()
+    def _fingerprint(self, entry: os.DirEntry) -> str:
+        stat = entry.stat()
         return f"{stat.st_mtime_ns}:{stat.st_size}"
 
-    def _log(self, to_index: list[Path], total: int) -> None:
+    def _log(self, to_index: list[os.DirEntry], total: int) -> None:
         print(f"[scan] {len(to_index)} to index, {total - len(to_index)} already indexed", flush=True)
         for p in to_index:
             print(f"[scan]   {p.name}", flush=True)
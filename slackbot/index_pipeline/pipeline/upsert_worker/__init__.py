@@ -1,3 +1,3 @@
-from .upsert_worker import UpsertWorker
+from .upsert_worker import UPSERT_BATCH, UpsertWorker
 
-__all__ = ["UpsertWorker"]
+__all__ = ["UPSERT_BATCH", "UpsertWorker"]
@@ -1,5 +1,7 @@
 """CPU upsert worker — writes embedded chunks to ChromaDB."""
 
+import threading
+import time
 from pathlib import Path
 import modal
 from slackbot.modal_app import app, rag_vol
@@ -7,13 +9,21 @@ from slackbot.modal_app import app, rag_vol
 CHROMA_DIR = "/data/rag/chroma"
 CHROMA_COLLECTION = "rag_documents"
 UPSERT_BATCH = 5_000
+# Quiet period after an upsert before the volume is committed
+COMMIT_DEBOUNCE_S = 5.0
 
 upsert_image = modal.Image.debian_slim(python_version="3.12").pip_install("chromadb")
 
+# Single writer: every EmbedWorker input spawns upserts here, and SQLite on
+# the volume can't take concurrent writers from multiple containers.
+# Stays warm between index runs so the loaded collection (HNSW graph in RAM)
+# is reused instead of re-read from the volume on every Slack upload.
 @app.cls(
     image=upsert_image,
     volumes={"/data": rag_vol},
     timeout=60 * 60,
+    max_containers=1,
+    scaledown_window=10 * 60,
 )
 @modal.concurrent(max_inputs=1)
 class UpsertWorker:
@@ -27,24 +37,47 @@ class UpsertWorker:
         client = chromadb.PersistentClient(path=CHROMA_DIR)
         # Opens existing collection or creates a new empty one
         self._collection = client.get_or_create_collection(CHROMA_COLLECTION)
+        # Chroma rejects upserts above its SQLite-derived limit; never send more
+        self._max_batch = min(UPSERT_BATCH, client.get_max_batch_size())
+        # {source: fingerprint}, read from the collection once then kept current by upsert()
+        self._indexed: dict[str, str] | None = None
+
+        # Upserts mark the volume dirty; one background thread coalesces commits
+        self._write_lock = threading.Lock()
+        self._dirty = threading.Event()
+        threading.Thread(target=self._commit_loop, daemon=True).start()
+
+    @modal.exit()
+    def _teardown(self):
+        # Flush a burst still inside the debounce window before scale-down
+        self._commit()
 
     @modal.method()
-    def upsert(self, chunks: list, worker_id: int) -> int:
-        """Write chunks to ChromaDB in batches of UPSERT_BATCH.
+    def upsert(self, chunks: dict, worker_id: int) -> int:
+        """Write chunks to ChromaDB in batches of up to UPSERT_BATCH.
 
-        Each chunk is (id, embedding, text, metadata) from EmbedWorker.
+        chunks holds parallel columns from EmbedWorker: ids, embeddings
+        (float16 ndarray, half the bytes over the wire), documents, metadatas.
         """
-        print(f"  upsert-worker: upserting {len(chunks):,} chunks from worker-{worker_id}...", flush=True)
-        for i in range(0, len(chunks), UPSERT_BATCH):
-            batch = chunks[i : i + UPSERT_BATCH]
-            ids, embeddings, documents, metadatas = zip(*batch)
-            self._collection.upsert(
-                ids=list(ids),
-                embeddings=list(embeddings),
-                documents=list(documents),
-                metadatas=list(metadatas),
-            )
-        return len(chunks)
+        import numpy as np
+
+        n = len(chunks["ids"])
+        # Chroma's HNSW index stores float32
+        embeddings = np.asarray(chunks["embeddings"], dtype=np.float32)
+        print(f"  upsert-worker: upserting {n:,} chunks from worker-{worker_id}...", flush=True)
+        step = self._max_batch
+        with self._write_lock:
+            for i in range(0, n, step):
+                self._collection.upsert(
+                    ids=chunks["ids"][i : i + step],
+                    embeddings=embeddings[i : i + step],
+                    documents=chunks["documents"][i : i + step],
+                    metadatas=chunks["metadatas"][i : i + step],
+                )
+            if self._indexed is not None:
+                self._indexed.update(_fingerprints(chunks["metadatas"]))
+        self._dirty.set()
+        return n
 
     @modal.method()
     def get_indexed_files(self) -> dict[str, str]:
@@ -53,14 +86,49 @@ class UpsertWorker:
         Used by Scanner to compare disk fingerprints against what's
         already in ChromaDB, skipping files that haven't changed.
         """
+        # This container is the only writer, so after the first scan every
+        # change to the collection has passed through upsert()
+        with self._write_lock:
+            if self._indexed is None:
+                self._indexed = self._scan_indexed()
+            return dict(self._indexed)
+
+    def _scan_indexed(self) -> dict[str, str]:
         indexed: dict[str, str] = {}
         total = self._collection.count()
         page_size = 5_000
         for offset in range(0, total, page_size):
             result = self._collection.get(include=["metadatas"], limit=page_size, offset=offset)
-            for meta in result["metadatas"] or []:
-                source = meta.get("source")
-                fingerprint = meta.get("fingerprint")
-                if source and fingerprint:
-                    indexed[source] = fingerprint
+            indexed.update(_fingerprints(result["metadatas"] or []))
         return indexed
+
+    def _commit_loop(self) -> None:
+        """Commit once per burst of upserts instead of once per upsert call."""
+        while True:
+            self._dirty.wait()
+            time.sleep(COMMIT_DEBOUNCE_S)
+            try:
+                self._commit()
+            except Exception as e:
+                # Keep the thread alive; the volume is still dirty, so the next pass retries
+                print(f"  upsert-worker: volume commit failed, retrying: {e}", flush=True)
+
+    def _commit(self) -> None:
+        # Under the write lock so a commit never snapshots a half-written database
+        with self._write_lock:
+            if not self._dirty.is_set():
+                return
+            self._dirty.clear()
+            try:
+                rag_vol.commit()
+            except Exception:
+                self._dirty.set()
+                raise
+
+
+def _fingerprints(metadatas: list[dict]) -> dict[str, str]:
+    return {
+        meta["source"]: meta["fingerprint"]
+        for meta in metadatas
+        if meta.get("source") and meta.get("fingerprint")
+    }
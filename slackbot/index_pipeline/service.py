@@ -29,9 +29,13 @@ class IndexService:
         # Split files into per-worker batches (N_WORKERS × WORKERS_PER_GPU)
         batches = self._batch_builder.build(files)
 
-        # Embed on GPU, upsert to ChromaDB as each embed finishes
-        embeddings = self._embed_worker.embed.starmap(batches, order_outputs=False)
-        
-        chunks = sum(self._upsert_worker.upsert.remote(r) for r in embeddings)
+        # Embed on GPU; each worker streams its chunks to UpsertWorker as it goes
+        results = self._embed_worker.embed.starmap(batches, order_outputs=False)
+
+        # Embeddings go straight to UpsertWorker; only (count, worker_id) ints come back
+        chunks = 0
+        for count, worker_id in results:
+            assert isinstance(count, int) and isinstance(worker_id, int), "embed() must return (int, int)"
+            chunks += count
 
         return f"Indexed {chunks:,} passages."
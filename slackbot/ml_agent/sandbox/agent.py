@@ -1,8 +1,9 @@
 """Claude Agent SDK wrapper — runs inside the Modal sandbox.
 
-Long-lived stdin loop: reads JSON messages, runs the Claude SDK, prints
-responses, then a sentinel. One persistent ClaudeSDKClient stays alive
-across all turns — avoids the subprocess teardown/recreate that crashes.
+Long-lived stdin loop: reads JSON messages, runs the Claude SDK, writes
+each turn's response as one "<length>\n<payload>" frame. One persistent
+ClaudeSDKClient stays alive across all turns — avoids the subprocess
+teardown/recreate that crashes.
 """
 
 import asyncio
@@ -18,15 +19,17 @@ from claude_agent_sdk import (
     TextBlock,
 )
 
-END_SENTINEL = "__END__"
+# Longest request line stdin will buffer (asyncio's default is 64 KiB)
+MAX_REQUEST_BYTES = 1 << 20
 
 
 class Agent:
     """Persistent Claude SDK agent for multi-turn conversations."""
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, stdin: asyncio.StreamReader):
         self._api_key = api_key
         self._client: ClaudeSDKClient | None = None
+        self._stdin = stdin
 
     async def create_client(self):
         """Create (or recreate) the underlying Claude SDK client."""
@@ -49,34 +52,93 @@ class Agent:
 
     async def receive_prompt(self) -> str:
         """Read the next JSON request from stdin and return the message."""
-        line = await asyncio.to_thread(sys.stdin.readline)
-        return json.loads(line.strip())["message"]
+        line = await self._read_line()
+        if line is None:
+            raise ValueError(f"request line over {MAX_REQUEST_BYTES} bytes")
+        if not line:
+            raise EOFError("stdin closed")
+        return json.loads(line)["message"]
+
+    async def _read_line(self) -> bytes | None:
+        """Next stdin line (b"" at EOF), or None for a line over the reader's limit.
+
+        An oversized line is discarded through its newline, however many pipe
+        reads it spans. readline() would drop only what's buffered and hand
+        the tail back as a second request, costing MlHandler a second frame.
+        """
+        try:
+            return await self._stdin.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+        except asyncio.LimitOverrunError:
+            pass
+        while True:
+            try:
+                await self._stdin.readuntil(b"\n")
+                return None
+            except asyncio.LimitOverrunError as e:
+                await self._stdin.readexactly(e.consumed)
+            except asyncio.IncompleteReadError:
+                return None
 
     async def send_response(self, message: str):
-        """Forward a message to the Claude SDK and print responses to stdout."""
+        """Forward a message to the Claude SDK and write the response frame to stdout."""
         assert self._client is not None
         await self._client.query(message)
+        parts = []
         async for msg in self._client.receive_response():
             if isinstance(msg, AssistantMessage):
-                for block in msg.content:
-                    if isinstance(block, TextBlock):
-                        print(block.text, flush=True)
+                parts.extend(block.text for block in msg.content if isinstance(block, TextBlock))
             elif isinstance(msg, ResultMessage) and msg.is_error:
-                print(f"Error: {msg.result}", flush=True)
-        print(END_SENTINEL, flush=True)
+                parts.append(f"Error: {msg.result}")
+        _write_frame("\n".join(parts))
+
+
+async def _open_stdin() -> asyncio.StreamReader:
+    """Read stdin on the event loop itself rather than via a worker thread per line."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_REQUEST_BYTES)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    return reader
+
+
+def _write_frame(payload: str):
+    """One write per turn; the length is in characters, as the reader decodes text."""
+    sys.stdout.write(f"{len(payload)}\n{payload}")
+    sys.stdout.flush()
 
 
 async def main():
     api_key = os.environ.get("MODAL_SANDBOX_ID", "")
-    agent = Agent(api_key)
+    # Outside the loop: if stdin can't be wrapped, the process should exit, not report a bad request
+    stdin = await _open_stdin()
+    agent = Agent(api_key, stdin)
     await agent.create_client()
+    await serve(agent)
+
+
+async def serve(agent: Agent):
+    """Answer requests until stdin closes. Every request gets exactly one frame back, errors included."""
     while True:
         try:
             message = await agent.receive_prompt()
+        except EOFError:
+            return
+        except (ValueError, KeyError):
+            # Bad or oversized request line (JSONDecodeError is a ValueError); the client is fine
+            traceback.print_exc()
+            _write_frame("Error: malformed request")
+            continue
+        try:
             await agent.send_response(message)
-        except Exception:
+        except Exception as e:
+            # Either the CLI subprocess is gone, or the failed turn's remaining
+            # messages are still buffered in the client and would be replayed
+            # as the next answer; both need a new client
             traceback.print_exc()
+            _write_frame(f"Error: {e}")
             await agent.create_client()
 
 
-asyncio.run(main())
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,5 +1,6 @@
 """Stateless tool functions for the ReAct agent."""
 
+import os
 import subprocess
 import sys
 
@@ -52,7 +53,8 @@ def list_documents() -> str:
     """
     if not DOCS_DIR.exists():
         return "No documents directory found at /data/rag/docs/"
-    paths = [str(f) for f in sorted(DOCS_DIR.rglob("*")) if f.is_file()]
+    # os.walk sorts dirs from files via scandir's dirent types, no stat() per path
+    paths = sorted(os.path.join(root, f) for root, _, files in os.walk(DOCS_DIR) for f in files)
     return "\n".join(paths) if paths else "No files found in /data/rag/docs/"
 
 
@@ -60,7 +62,8 @@ def list_output_files() -> list[str]:
     """Return paths of files in the output directory."""
     if not OUTPUT_DIR.exists():
         return []
-    return [str(p) for p in sorted(OUTPUT_DIR.iterdir()) if p.is_file()]
+    with os.scandir(OUTPUT_DIR) as it:
+        return sorted(e.path for e in it if e.is_file())
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -2,17 +2,28 @@
 
 import json
 import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Iterator
 
-END_SENTINEL = "__END__"
+# Longest a Slack thread waits for one agent turn; matches the sandbox's own timeout
+TURN_TIMEOUT_S = 60 * 60
 
 
 class MlHandler:
-    """Run prompts in the ML training sandbox via stdin/stdout."""
+    """Run prompts in the ML training sandbox via stdin/stdout.
+
+    The agent answers prompts strictly in stdin order, one frame each, so
+    the lock only orders writes: every prompt queues a Future before it is
+    written, and a reader thread per sandbox resolves them as frames arrive.
+    Slack threads wait on their own Future rather than on the lock.
+    """
 
     def __init__(self, sb_fn):
         self._get_sb = sb_fn
         self._sandbox = None
-        self._stdout = None
+        # Futures for prompts written to the current sandbox, oldest first
+        self._turns: deque[Future] = deque()
         self._lock = threading.Lock()
 
     def handle(self, prompt: str, thread_ts: str, say) -> None:
@@ -20,18 +31,19 @@ class MlHandler:
         session = f"agent-{thread_ts}".replace(".", "-")
         request = json.dumps({"message": prompt, "session": session})
 
+        turn: Future = Future()
         with self._lock:
             self._ensure_sandbox()
-            self._sandbox.stdin.write(request + "\n")
-            self._sandbox.stdin.drain()
-
-            lines = []
-            for line in self._stdout:
-                if END_SENTINEL in line:
-                    break
-                lines.append(line)
+            self._turns.append(turn)
+            try:
+                self._sandbox.stdin.write(request + "\n")
+                self._sandbox.stdin.drain()
+            except Exception:
+                # The agent never got this prompt; a queued turn would take the next one's frame
+                self._turns.pop()
+                raise
 
-        response = "\n".join(lines).strip()
+        response = turn.result(timeout=TURN_TIMEOUT_S).strip()
         say(response or "(No response from agent)")
 
     def _is_alive(self):
@@ -45,5 +57,61 @@ class MlHandler:
     def _ensure_sandbox(self):
         if not self._is_alive():
             self._sandbox = self._get_sb()
-            # Reuse a single iterator across turns to maintain position
-            self._stdout = iter(self._sandbox.stdout)
+            self._turns = deque()
+            threading.Thread(
+                target=self._relay, args=(self._sandbox, self._turns), daemon=True
+            ).start()
+
+    def _relay(self, sandbox, turns: deque) -> None:
+        """Hand each response frame from one sandbox to the oldest waiting prompt."""
+        stdout = iter(sandbox.stdout)
+        buffer = ""
+        error = None
+        try:
+            while True:
+                frame, buffer = _read_frame(stdout, buffer)
+                if frame is None:
+                    break
+                turns.popleft().set_result(frame)
+        except Exception as e:
+            # Not a frame (e.g. a sandbox still on an older protocol), a frame
+            # nobody asked for, or a stream error: this sandbox can't be trusted
+            print(f"[ml] sandbox output unreadable, dropping it: {e!r}", flush=True)
+            error = e
+
+        # Answer what's still queued and make the next prompt start a new sandbox
+        with self._lock:
+            if self._sandbox is sandbox:
+                self._sandbox = None
+            while turns:
+                turn = turns.popleft()
+                if error is None:
+                    turn.set_result("")
+                else:
+                    turn.set_exception(error)
+        if error is not None:
+            # Otherwise get_sandbox() would reattach to it by name
+            sandbox.terminate()
+
+
+def _read_frame(stdout: Iterator[str], buffer: str) -> tuple[str | None, str]:
+    """Read one "<length>\\n<payload>" frame. Returns (payload, leftover text).
+
+    The agent writes each turn as one length-prefixed frame, so this just
+    accumulates stdout chunks until the announced length is in hand instead
+    of scanning every line for an end marker. Payload is None at EOF.
+    """
+    try:
+        while "\n" not in buffer:
+            buffer += next(stdout)
+        header, rest = buffer.split("\n", 1)
+        size = int(header)
+        parts, have = [rest], len(rest)
+        while have < size:
+            part = next(stdout)
+            parts.append(part)
+            have += len(part)
+    except StopIteration:
+        return None, ""
+    body = "".join(parts)
+    return body[:size], body[size:]
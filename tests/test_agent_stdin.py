@@ -0,0 +1,62 @@
+"""Request framing of the sandbox agent's stdin loop."""
+
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import unittest
+from pathlib import Path
+
+AGENT_PATH = Path(__file__).parent.parent / "slackbot" / "ml_agent" / "sandbox" / "agent.py"
+
+
+def _load_agent():
+    spec = importlib.util.spec_from_file_location("sandbox_agent", AGENT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _frames(out: str) -> list[str]:
+    frames = []
+    while out:
+        header, out = out.split("\n", 1)
+        size = int(header)
+        frames.append(out[:size])
+        out = out[size:]
+    return frames
+
+
+@unittest.skipUnless(importlib.util.find_spec("claude_agent_sdk"), "claude-agent-sdk not installed")
+class OversizedRequestTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_oversized_line_split_across_reads_gets_one_frame(self):
+        agent_mod = _load_agent()
+        reader = asyncio.StreamReader(limit=32)
+        agent = agent_mod.Agent("", reader)
+
+        async def send_response(message):
+            agent_mod._write_frame(f"ok:{message}")
+
+        agent.send_response = send_response
+
+        oversized = json.dumps({"message": "x" * 100}).encode() + b"\n"
+
+        async def feed():
+            # Past the limit with no newline yet, then the rest in a later read
+            reader.feed_data(oversized[:60])
+            await asyncio.sleep(0.01)
+            reader.feed_data(oversized[60:])
+            reader.feed_data(b'{"message": "hi"}\n')
+            reader.feed_eof()
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+            await asyncio.gather(agent_mod.serve(agent), feed())
+
+        self.assertEqual(_frames(out.getvalue()), ["Error: malformed request", "ok:hi"])
+
+
+if __name__ == "__main__":
+    unittest.main()